@@ -0,0 +1,143 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Cython build of the simulated annealing kernel from test.py, for deployments where Numba isn't available.
+
+It takes the same arguments as test.sa_kernel and follows the same steps: 2-opt moves accepted on the O(1) edge
+delta, the full tour cost checked every `kick` iterations, and a double-bridge kick after each check. The
+annealing loop runs without the GIL, so several chains can run in parallel threads.
+"""
+import numpy as np
+from libc.math cimport INFINITY
+
+
+cdef inline float refill_time(float[:, ::1] f2w, int a, int b) noexcept nogil:
+    """
+    Time to fly from fire a to fire b via the water point that makes the detour shortest.
+    """
+    cdef float best = INFINITY
+    cdef float leg
+    cdef Py_ssize_t w
+    for w in range(f2w.shape[1]):
+        leg = f2w[a, w] + f2w[b, w]
+        if leg < best:
+            best = leg
+    return best
+
+
+cdef float tour_cost(int[::1] perm, float[:, ::1] dist, float[::1] home, float[::1] t, float[::1] val,
+                     float[:, ::1] f2w, int capacity, float flight_time) noexcept nogil:
+    """
+    Energy of a tour: the negated fire value suppressed before the flight time runs out.
+    """
+    cdef Py_ssize_t n = perm.shape[0]
+    cdef Py_ssize_t k
+    cdef int i
+    cdef int load = capacity
+    cdef float clock = home[perm[0]]  # Flight from home to the first fire
+    cdef float total = 0
+    for k in range(n):
+        i = perm[k]
+        clock += t[i]
+        if clock > flight_time:
+            break
+        total += val[i]
+        load -= 1
+        if k + 1 < n:
+            # Detour to water once the tank is empty, otherwise fly straight to the next fire
+            if load == 0:
+                clock += refill_time(f2w, i, perm[k + 1])
+                load = capacity
+            else:
+                clock += dist[i, perm[k + 1]]
+    return -total
+
+
+cdef inline bint sa_step(float[:, ::1] dist, float[::1] home, int[::1] cur, int i, int j, float T,
+                         float neg_log_u) noexcept nogil:
+    """
+    Proposes reversing cur[i..j] and applies it in place if the Metropolis test accepts; returns whether it did.
+    """
+    cdef int a, b, c, d, tmp
+    cdef float delta
+    if i == j:
+        return False
+    if i > j:
+        i, j = j, i
+    b, c = cur[i], cur[j]
+    # Edge into the segment: (a, b) becomes (a, c), with home standing in for a when the segment starts the path
+    if i == 0:
+        delta = home[c] - home[b]
+    else:
+        a = cur[i - 1]
+        delta = dist[a, c] - dist[a, b]
+    # Edge out of the segment: (c, d) becomes (b, d); a segment ending the path has none
+    if j < cur.shape[0] - 1:
+        d = cur[j + 1]
+        delta += dist[b, d] - dist[c, d]
+    if not delta < T * neg_log_u:
+        return False
+    while i < j:
+        tmp = cur[i]
+        cur[i] = cur[j]
+        cur[j] = tmp
+        i += 1
+        j -= 1
+    return True
+
+
+cdef void double_bridge(int[::1] cur, int[::1] scratch, int p1, int p2, int p3) noexcept nogil:
+    """
+    Reconnects the tour segments A B C D, split at p1 < p2 < p3, as A C B D in place. A is empty when p1 is 0.
+    """
+    cdef int x
+    cdef int k = 0
+    for x in range(p2, p3):
+        scratch[k] = cur[x]
+        k += 1
+    for x in range(p1, p2):
+        scratch[k] = cur[x]
+        k += 1
+    for x in range(p3 - p1):
+        cur[p1 + x] = scratch[x]
+
+
+def sa_kernel(int[::1] perm, float[:, ::1] dist, float[::1] home, float[::1] t, float[::1] val,
+              float[:, ::1] f2w, int capacity, float flight_time, float[::1] temps,
+              float[::1] neg_log_u, int[::1] ii, int[::1] jj, int kick, bint return_to_best, seed):
+    """
+    Simulated annealing over a fire index permutation using 2-opt segment reversals; returns the best tour.
+    """
+    cdef Py_ssize_t n = perm.shape[0]
+    cdef Py_ssize_t iters = neg_log_u.shape[0]
+    cdef Py_ssize_t k
+    cdef int kicks_done = 0
+    cdef float f, best_f
+    cur_arr = np.array(perm, dtype=np.int32)
+    best_arr = cur_arr.copy()
+    cdef int[::1] cur = cur_arr
+    cdef int[::1] best = best_arr
+    cdef int[::1] scratch = np.empty(n, dtype=np.int32)
+    best_f = tour_cost(cur, dist, home, t, val, f2w, capacity, flight_time)
+    if n < 3:
+        return best_arr
+    # Cut points for every double-bridge kick are drawn up front, while the GIL is still held
+    rng = np.random.default_rng(seed)
+    cdef int[:, ::1] cuts = np.asarray(
+        [np.sort(rng.choice(np.arange(0, n), 3, replace=False)) for _ in range(iters // kick)], dtype=np.int32
+    ).reshape(-1, 3)
+    with nogil:
+        for k in range(iters):
+            sa_step(dist, home, cur, ii[k], jj[k], temps[k], neg_log_u[k])
+            if (k + 1) % kick == 0:
+                f = tour_cost(cur, dist, home, t, val, f2w, capacity, flight_time)
+                if f < best_f:
+                    best[:] = cur
+                    best_f = f
+                elif return_to_best:
+                    cur[:] = best
+                double_bridge(cur, scratch, cuts[kicks_done, 0], cuts[kicks_done, 1], cuts[kicks_done, 2])
+                kicks_done += 1
+        f = tour_cost(cur, dist, home, t, val, f2w, capacity, flight_time)
+        if f < best_f:
+            best[:] = cur
+    return best_arr
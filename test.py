@@ -20,20 +20,52 @@ This approach allows for the dynamic adjustment of the drone's strategy in real-
 from re import T
 from student_base import student_base  # Base class for drone control, assuming definition elsewhere
 import time
+import os
+import functools
 import numpy as np
 import json
 import math
 import geopandas as gpd
+import shapely
 from shapely.geometry import Point, Polygon, LineString
 from shapely.ops import nearest_points
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import cdist
 import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+try:
+    from numba import njit, prange
+    NUMBA = True
+except ImportError:  # Without Numba the kernels run as plain Python and SA chains fan out over processes
+    NUMBA = False
+    prange = range
+    def njit(*args, **kwargs):
+        return lambda f: f
+CYTHON = False
+if not NUMBA:
+    try:  # Prefer the GIL-free Cython build of the SA kernel when a compiler is available
+        import pyximport
+        pyximport.install(language_level=3)
+        from sa_kernel import sa_kernel as c_sa_kernel
+        CYTHON = True
+    except ImportError:
+        pass
+
+# Suppression shrinks a fire's area by 5% per step, at 5.189 steps per second
+_C_POW = .95
+_LOG095 = math.log(_C_POW)
+_C_TIME = 1.0 / (_LOG095 * 5.189)
 
 class Waypoint():
     """
     Represents a basic location point in a drone's tour, including coordinates, time spent, and target information.
     """
     def __init__(self, coords, time, target):
-        self.coords = coords  # Geographic coordinates of the waypoint
+        # Geographic (x, y) coordinates of the waypoint, kept as plain floats rather than a Shapely Point
+        if hasattr(coords, 'x'):
+            self.coords = (float(coords.x), float(coords.y))
+        else:
+            self.coords = (float(coords[0]), float(coords[1]))
         self.time = time      # Time spent at the waypoint
         self.target = target  # Target attribute, usage varies by subclass
 
@@ -41,33 +73,25 @@ class Fire(Waypoint):
     """
     Represents a fire within the tour. Inherits from Waypoint and adds a polygonal representation of the fire.
     """
+    TARGET_AREA = 1e-8  # Intended suppression area for fires; adjust based on operational criteria
+
     def __init__(self, poly):
         self.poly = poly  # Polygon representing the fire's area
-        super().__init__(poly.centroid, self.time(), self.target_area())
-        # Initialize with centroid of the fire, calculated time, and target area
-
-    def time(self):
-        """
-        Computes effective time spent at fire, considering factors like suppression progress and command delays.
-        """
-        transit = 5  # Base time spent on suppression
-        # If the fire area is larger than the target, adjust the time based on the area difference
-        if self.poly.area >= self.target_area(): 
-            transit += math.log(self.target_area() / self.poly.area) / math.log(.95) / 5.189
-        return transit
-
-    def target_area(self):
-        """
-        Defines the intended suppression area for fires.
-        """
-        return 1e-8  # Example value; adjust based on operational criteria
+        self._area = poly.area  # Cached so GEOS is only asked for the area once
+        # Effective time spent at fire: base suppression time, plus the time needed to shrink the area to the target
+        transit = 5.0  # Base time spent on suppression
+        if self._area >= self.TARGET_AREA:
+            transit += math.log(self.TARGET_AREA / self._area) * _C_TIME
+        centroid = poly.centroid
+        super().__init__((centroid.x, centroid.y), transit, self.TARGET_AREA)
+        # Area reduction is scaled for relevance and rounded to nearest whole number
+        self._value = round((self._area - self._area * math.exp(self.time*5.189*_LOG095))*1e10)
 
     def value(self):
         """
-        Calculates the value of time spent at this fire, based on area reduction achieved.
+        Returns the value of time spent at this fire, based on area reduction achieved.
         """
-        # Area reduction is scaled for relevance and rounded to nearest whole number
-        return round((self.poly.area - self.poly.area * math.pow(.95, self.time*5.189))*1e10)
+        return self._value
 
 class Water(Waypoint):
     """
@@ -76,15 +100,104 @@ class Water(Waypoint):
     def __init__(self, coords, time, target):
         super().__init__(coords, time, target)  # Inherits initialization from Waypoint
 
+VELOCITY = 1.1976737e-4  # Empirical velocity value (degrees per second)
+WATER_CAPACITY = 5       # Fires that can be suppressed per water load
+FLIGHT_TIME = 600.0      # Mission duration in seconds
+
+WATER_GEOJSON = './data/waterbodies.geojson'
+WATER_CACHE = './data/waterbodies.npz'
+
+def _load_water_cached():
+    """
+    Loads water body arrays from WATER_CACHE, regenerating the cache when the GeoJSON exists and is newer.
+
+    Returns representative points (xy), bounding boxes (bbox), and the geometries as concatenated WKB bytes
+    (wkb) with their start offsets (wkb_offsets), so polygons only need rebuilding when actually used.
+    """
+    # Without the GeoJSON the cache is the only source, so it is used as-is
+    if os.path.exists(WATER_CACHE) and (not os.path.exists(WATER_GEOJSON)
+                                        or os.path.getmtime(WATER_CACHE) >= os.path.getmtime(WATER_GEOJSON)):
+        with np.load(WATER_CACHE) as cache:
+            return {key: cache[key] for key in cache.files}
+    geoms = gpd.read_file(WATER_GEOJSON)['geometry'].values
+    blobs = [shapely.to_wkb(g) for g in geoms]
+    water = {
+        'xy': np.vstack([np.asarray(g.representative_point().coords)[0] for g in geoms]),
+        'bbox': np.asarray(shapely.bounds(geoms), dtype=np.float64),
+        'wkb': np.frombuffer(b''.join(blobs), dtype=np.uint8),
+        'wkb_offsets': np.cumsum([0] + [len(b) for b in blobs], dtype=np.int64),
+    }
+    try:
+        np.savez(WATER_CACHE, **water)
+    except OSError:  # The cache is only an optimization; a read-only data directory just means reparsing next time
+        pass
+    return water
+
+@functools.lru_cache(maxsize=None)
+def shared_gps():
+    """
+    Returns the process-wide GPS instance, so every Tour reuses the same loaded map data.
+    """
+    return GPS()
+
 class GPS():
     """
     Utility class for calculating geometric and geographic relationships, such as distances and nearest points.
     """
     def __init__(self):
-        self.home = Point(-70.6185, 42.98575)  # Home location of the drone
-        self.water = gpd.read_file('./data/waterbodies.geojson')['geometry']  # Load water bodies for refilling
+        self.home = (-70.6185, 42.98575)  # Home location of the drone, as (x, y) like every other coordinate
+        self._water = _load_water_cached()  # Load water bodies for refilling
+        # Index one representative point per water body so nearest-water queries are O(log N)
+        self._water_xy = self._water['xy']
+        self._water_tree = cKDTree(self._water_xy)
         self.fires = self._load_fires()  # Load fire data
 
+    @functools.cached_property
+    def water(self):
+        """
+        Water body geometries, decoded from the cached WKB the first time they are needed.
+        """
+        wkb, offsets = self._water['wkb'], self._water['wkb_offsets']
+        return gpd.GeoSeries([shapely.from_wkb(wkb[a:b].tobytes()) for a, b in zip(offsets[:-1], offsets[1:])])
+
+    @functools.cached_property
+    def _fire_time(self):
+        """
+        Suppression time of every fire, indexed like self.fires.
+        """
+        return np.asarray([f.time for f in self.fires], dtype=np.float32)
+
+    @functools.cached_property
+    def _fire_val(self):
+        """
+        Value of every fire, indexed like self.fires.
+        """
+        return np.asarray([f.value() for f in self.fires], dtype=np.float32)
+
+    @functools.cached_property
+    def _D(self):
+        """
+        Travel times between every pair of fires, computed in float64 (raw lon/lat need it) and stored as float32.
+        """
+        return (cdist(self._fire_xy, self._fire_xy) / VELOCITY).astype(np.float32)
+
+    @functools.cached_property
+    def _Df2w(self):
+        """
+        Travel times from every fire to every water point, stored as float32 like _D.
+        """
+        return (cdist(self._fire_xy, self._water_xy) / VELOCITY).astype(np.float32)
+
+    @functools.cached_property
+    def _fire_multi(self):
+        """
+        One prepared geometry covering every fire, so point-in-fire checks run as a single batched GEOS call.
+        Fires can overlap, so they are unioned rather than wrapped in a (then invalid) MultiPolygon.
+        """
+        multi = shapely.union_all([f.poly for f in self.fires])
+        shapely.prepare(multi)
+        return multi
+
     def _load_fires(self):
         """
         Loads fire data from a JSON file into Fire objects.
@@ -93,28 +206,75 @@ class GPS():
             data = json.load(f)
         shapes = zip(data['data_fs']['xs'], data['data_fs']['ys'])
         # Create Fire objects for each fire polygon in the dataset
-        return [Fire(Polygon(list(zip(*shape)))) for shape in shapes]
+        fires = [Fire(Polygon(list(zip(*shape)))) for shape in shapes]
+        # Cache fire centroids as a plain array so nearest-fire queries stay in NumPy instead of GEOS
+        self._fire_xy = np.asarray([f.coords for f in fires], dtype=np.float64)
+        return fires
 
     def travel_time(self, p1, p2):
         """
-        Calculates the time to travel between two points, using an empirically determined velocity.
+        Calculates the time to travel between two (x, y) points, using an empirically determined velocity.
+        """
+        return math.hypot(p1[0] - p2[0], p1[1] - p2[1]) / VELOCITY
+
+    def travel_times(self, p, xy):
+        """
+        Vectorized travel_time from a single (x, y) point to every row of an (N, 2) coordinate array.
         """
-        v = 1.1976737e-4  # Empirical velocity value
-        return p1.distance(p2) / v
+        return np.hypot(xy[:, 0] - p[0], xy[:, 1] - p[1]) / VELOCITY
 
-    # Additional methods for nearest fire, water point, etc., follow a similar pattern:
+    def nearest_fire(self, pos_xy, active=None):
+        """
+        Returns the index of the fire whose centroid is closest to the given (x, y) position,
+        optionally restricted to the fires set in a boolean `active` mask.
+        """
+        xy = self._fire_xy
+        # Squared distance preserves the ordering, so the sqrt is skipped
+        d2 = (xy[:, 0] - pos_xy[0])**2 + (xy[:, 1] - pos_xy[1])**2
+        if active is not None:
+            d2[~active] = np.inf
+        return int(np.argmin(d2))
+
+    def contains_any(self, xs, ys):
+        """
+        Returns a boolean array marking which of the given points lie inside any fire.
+        """
+        return shapely.contains_xy(self._fire_multi, np.asarray(xs), np.asarray(ys))
+
+    def nearest_water_xy(self, pos_xy):
+        """
+        Returns the distance to and index of the water body nearest to the given (x, y) position.
+        """
+        dist, idx = self._water_tree.query(pos_xy)
+        # Representative points sit inside their polygons, so only check containment for the candidate found,
+        # and only decode its geometry when the position falls within its bounding box
+        minx, miny, maxx, maxy = self._water['bbox'][idx]
+        if minx <= pos_xy[0] <= maxx and miny <= pos_xy[1] <= maxy and self.water.iloc[idx].distance(Point(pos_xy)) == 0:
+            dist = 0.0
+        return dist, idx
+
+    # Additional methods for water point, etc., follow a similar pattern:
     # They calculate geometric relationships based on the drone's current position and the locations of fires and water sources.
 
 class Tour():
     """
     Manages the creation and assessment of a tour or path through fires and water points for a drone.
     """
-    def __init__(self, *args):
-        self.start = Point(-70.6185, 42.98575)  # Starting point of the tour
-        self.gps = GPS()  # GPS object for geometric calculations
+    def __init__(self, path=None, gps=None):
+        # GPS object for geometric calculations; tours share one unless a specific instance is injected
+        self.gps = gps if gps is not None else shared_gps()
+        self.start = self.gps.home  # Starting point of the tour
+        # Fire data as parallel arrays indexed like gps.fires; the path is an int32 array of these indices.
+        # The arrays and travel-time matrices are built once per GPS and shared by every tour on it.
+        self.fire_xy = self.gps._fire_xy
+        self.fire_time = self.gps._fire_time
+        self.fire_val = self.gps._fire_val
+        self.D = self.gps._D        # Fire-to-fire travel times
+        self.Df2w = self.gps._Df2w  # Fire-to-water travel times
+        self.home_time = self.gps.travel_times(self.start, self.fire_xy).astype(np.float32)  # From the start to every fire
 
-        # Generate the initial path either from provided arguments or by creating a fire tour
-        if args: self.path = args[0]
+        # Generate the initial path either from the provided path or by creating a fire tour
+        if path is not None: self.path = np.asarray(path, dtype=np.int32)
         else: self.path = self.fire_tour()
 
     def fire_tour(self):
@@ -122,20 +282,199 @@ class Tour():
         Generates an initial tour by sequentially visiting nearest fires, ignoring water needs.
         """
         pos = self.start
-        path = []
+        path = np.empty(len(self.fire_xy), dtype=np.int32)
+        active = np.ones(len(self.fire_xy), dtype=bool)  # Kept local so the shared GPS is never mutated
         # Iterate through all fires, selecting the nearest one each time
-        for _ in range(len(self.gps.fires)):
-            closest_fire = self.gps.nearest_fire(pos)
-            self.gps.fires.remove(closest_fire)  # Remove the selected fire from consideration
-            pos = closest_fire.coords  # Move position to the selected fire
-            path.append(closest_fire)  # Add the fire to the tour path
+        for k in range(len(path)):
+            i = self.gps.nearest_fire(pos, active)
+            active[i] = False  # Remove the selected fire from consideration
+            pos = self.fire_xy[i]  # Move position to the selected fire
+            path[k] = i  # Add the fire to the tour path
         return path
 
+    def fires(self):
+        """
+        Returns the Fire objects in tour order, for handing the tour to the flight controller.
+        """
+        return [self.gps.fires[i] for i in self.path]
+
     # Additional methods like 'with_water' and 'assess' provide functionality for adjusting the path to include water stops and assess the effectiveness of a tour.
 
-# Other classes like my_flight_controller and utility functions such as swap and anneal continue the pattern of detailed simulation and optimization of drone operations.
+@njit(cache=True, fastmath=True)
+def refill_time(f2w, a, b):
+    """
+    Time to fly from fire a to fire b via the water point that makes the detour shortest.
+    """
+    best = np.float32(np.inf)
+    for w in range(f2w.shape[1]):
+        leg = f2w[a, w] + f2w[b, w]
+        if leg < best:
+            best = leg
+    return best
+
+@njit(cache=True, fastmath=True)
+def tour_cost(perm, dist, home, t, val, f2w, capacity, flight_time):
+    """
+    Energy of a tour: the negated fire value suppressed before the flight time runs out.
+    """
+    clock = home[perm[0]]  # Flight from home to the first fire
+    load = capacity
+    total = np.float32(0.0)
+    n = perm.shape[0]
+    for k in range(n):
+        i = perm[k]
+        clock += t[i]
+        if clock > flight_time:
+            break
+        total += val[i]
+        load -= 1
+        if k + 1 < n:
+            # Detour to water once the tank is empty, otherwise fly straight to the next fire
+            if load == 0:
+                clock += refill_time(f2w, i, perm[k + 1])
+                load = capacity
+            else:
+                clock += dist[i, perm[k + 1]]
+    return -total
+
+@njit(cache=True, fastmath=True)
+def double_bridge(perm):
+    """
+    Cuts the tour into four segments A B C D and reconnects them as A C B D to escape 2-opt local minima.
+    A may be empty, so the kick can also change which fire is visited first.
+    """
+    n = perm.shape[0]
+    cuts = np.sort(np.random.choice(np.arange(0, n), 3, replace=False))
+    p1, p2, p3 = cuts[0], cuts[1], cuts[2]
+    return np.concatenate((perm[:p1], perm[p2:p3], perm[p1:p2], perm[p3:]))
+
+@njit(cache=True, fastmath=True)
+def two_opt_delta(cur, dist, home, i, j):
+    """
+    Change in travel time from reversing cur[i..j] (i < j) on the open path that starts at home.
+    """
+    b, c = cur[i], cur[j]
+    # Edge into the segment: (a, b) becomes (a, c), with home standing in for a when the segment starts the path
+    if i == 0:
+        delta = home[c] - home[b]
+    else:
+        a = cur[i - 1]
+        delta = dist[a, c] - dist[a, b]
+    # Edge out of the segment: (c, d) becomes (b, d); a segment ending the path has none
+    if j < cur.shape[0] - 1:
+        d = cur[j + 1]
+        delta += dist[b, d] - dist[c, d]
+    return delta
+
+@njit(cache=True, fastmath=True)
+def sa_kernel(perm, dist, home, t, val, f2w, capacity, flight_time, temps, neg_log_u, ii, jj, kick, return_to_best, seed):
+    """
+    Simulated annealing over a fire index permutation using 2-opt segment reversals.
+
+    Random draws and the cooling schedule are pre-generated: iteration k runs at temperature temps[k], proposes
+    reversing between positions ii[k] and jj[k] and uses neg_log_u[k] = -log(u) for its uniform sample u in the
+    Metropolis test.
+
+    Moves are accepted on the O(1) change in travel time; the full tour_cost is only evaluated every `kick`
+    iterations, when the best tour is recorded and a double-bridge kick is applied. With `return_to_best`, a
+    checkpoint that didn't improve on the best tour restarts from it before kicking.
+    """
+    np.random.seed(seed)
+    n = perm.shape[0]
+    cur = perm.copy()
+    best = cur.copy()
+    best_f = tour_cost(cur, dist, home, t, val, f2w, capacity, flight_time)
+    if n < 3:
+        return best
+    for k in range(neg_log_u.shape[0]):
+        # Propose reversing cur[i..j]; any position can move, including the first and last fire
+        i = ii[k]
+        j = jj[k]
+        if i != j:
+            if i > j:
+                i, j = j, i
+            delta = two_opt_delta(cur, dist, home, i, j)
+            # Metropolis rule: always accept improvements, sometimes accept worse tours
+            # u < exp(-delta / T) rearranged as delta < T * -log(u), so no exp or division runs per step
+            if delta < temps[k] * neg_log_u[k]:
+                cur[i:j + 1] = cur[i:j + 1][::-1].copy()
+        if (k + 1) % kick == 0:
+            f = tour_cost(cur, dist, home, t, val, f2w, capacity, flight_time)
+            if f < best_f:
+                best = cur.copy()
+                best_f = f
+            elif return_to_best:
+                cur = best.copy()
+            cur = double_bridge(cur)
+    f = tour_cost(cur, dist, home, t, val, f2w, capacity, flight_time)
+    if f < best_f:
+        best = cur.copy()
+    return best
+
+@njit(cache=True, parallel=True)
+def multi_sa(perm, dist, home, t, val, f2w, capacity, flight_time, temps, neg_log_u, ii, jj, kick, return_to_best, seed):
+    """
+    Runs one sa_kernel chain per row of the random draw arrays in parallel and returns the best tour and its cost.
+    """
+    chains = neg_log_u.shape[0]
+    results = np.empty((chains, perm.shape[0]), dtype=np.int32)
+    costs = np.empty(chains, dtype=np.float32)
+    for c in prange(chains):
+        # Chains only share read-only inputs; each one anneals its own copy of the permutation
+        results[c] = sa_kernel(perm, dist, home, t, val, f2w, capacity, flight_time, temps,
+                               neg_log_u[c], ii[c], jj[c], kick, return_to_best, seed + c)
+        costs[c] = tour_cost(results[c], dist, home, t, val, f2w, capacity, flight_time)
+    c = np.argmin(costs)
+    return results[c], costs[c]
+
+def _sa_chain(args):
+    """
+    Runs a single chain and scores it; the executor counterpart of one multi_sa iteration.
+    """
+    best = c_sa_kernel(*args) if CYTHON else sa_kernel(*args)
+    perm, dist, home, t, val, f2w, capacity, flight_time = args[:8]
+    return best, tour_cost(best, dist, home, t, val, f2w, capacity, flight_time)
+
+def anneal(tour, T0, iters, alpha=0.995, kick=None, seed=0, chains=4, reheat=None, return_to_best=False):
+    """
+    Optimizes a tour with simulated annealing over several independent chains and returns the best tour found.
+
+    The temperature decays geometrically from T0 by `alpha` per iteration, restarting at T0 every `reheat`
+    iterations when given. The tour is scored and kicked every `kick` iterations, twenty times per run by default.
+    """
+    if kick is None:
+        kick = max(1, iters // 20)
+    elif kick < 1:
+        raise ValueError(f"kick must be at least 1, got {kick}")
+    elif kick > iters:
+        raise ValueError(f"kick ({kick}) exceeds iters ({iters}); the tour would never be scored during annealing")
+    if reheat is not None and reheat < 1:
+        raise ValueError(f"reheat must be at least 1, got {reheat}")
+    n = len(tour.path)
+    # The cooling schedule is precomputed so no temperature is carried from one iteration to the next
+    steps = np.arange(iters) if reheat is None else np.arange(iters) % reheat
+    temps = (T0 * alpha ** steps).astype(np.float32)
+    # Draw every random number the kernel needs up front, in bulk, one row per chain
+    rng = np.random.default_rng(seed)
+    neg_log_u = -np.log1p(-rng.random((chains, iters))).astype(np.float32)  # -log(u) for u in (0, 1]
+    ii = rng.integers(0, max(n, 1), size=(chains, iters), dtype=np.int32)
+    jj = rng.integers(0, max(n, 1), size=(chains, iters), dtype=np.int32)
+    shared = (tour.path, tour.D, tour.home_time, tour.fire_time, tour.fire_val, tour.Df2w,
+              WATER_CAPACITY, FLIGHT_TIME, temps)
+    if NUMBA:
+        best, _ = multi_sa(*shared, neg_log_u, ii, jj, kick, return_to_best, seed)
+    else:
+        # The Cython kernel releases the GIL, so its chains can run as threads; plain Python needs processes
+        with (ThreadPoolExecutor(chains) if CYTHON else ProcessPoolExecutor()) as pool:
+            runs = pool.map(_sa_chain, [shared + (neg_log_u[c], ii[c], jj[c], kick, return_to_best, seed + c)
+                                        for c in range(chains)])
+            best, _ = min(runs, key=lambda run: run[1])
+    return Tour(best, gps=tour.gps)
+
+# Other classes like my_flight_controller continue the pattern of detailed simulation and optimization of drone operations.
 
 if __name__ == "__main__":
-    nearest_neighbors = Tour()  # Create an initial tour
+    gps = shared_gps()  # Load the map once and share it with every tour
+    nearest_neighbors = Tour(gps=gps)  # Create an initial tour
     opt_path = anneal(nearest_neighbors, 20, 500)  # Optimize the tour using simulated annealing
-    my_flight_controller(opt_path).run()  # Execute the optimized tour
+    my_flight_controller(opt_path.fires()).run()  # Execute the optimized tour, handing over Fire objects in order